@@ -14,12 +14,15 @@ rm -rf venv
 echo "Removing database files..."
 rm -f queuectl.db
 rm -f queuectl.db-journal
+rm -f queuectl.db-wal queuectl.db-shm
 
 # 4. Remove logs and temporary files
 echo "Removing logs and temporary files..."
 rm -f dashboard.log
 rm -f .dashboard.pid
 rm -f dashboard_status.json
+rm -rf .queuectl_wakeup
+rm -rf .queuectl_logs
 
 # 5. Remove test artifacts
 rm -f test_output.txt
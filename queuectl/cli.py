@@ -13,9 +13,26 @@ from .database import Storage
 from .worker_manager import WorkerManager
 
 
-# Create storage instance
-storage = Storage()
-manager = WorkerManager()
+# Created on first use so commands that never touch the database (e.g.
+# `worker status`) don't open it or run schema checks
+_storage = None
+_manager = None
+
+
+def get_storage() -> Storage:
+    """Return the shared Storage instance, opening it on first use."""
+    global _storage
+    if _storage is None:
+        _storage = Storage()
+    return _storage
+
+
+def get_manager() -> WorkerManager:
+    """Return the shared WorkerManager instance."""
+    global _manager
+    if _manager is None:
+        _manager = WorkerManager()
+    return _manager
 
 
 @click.group()
@@ -51,7 +68,7 @@ def enqueue(priority, timeout, job_json):
         else:
             job_data = json.loads(job_json)
         
-        config = storage.get_config()
+        config = get_storage().get_config()
         if 'max_retries' not in job_data:
             job_data['max_retries'] = config.max_retries
 
@@ -71,20 +88,15 @@ def enqueue(priority, timeout, job_json):
                 job_data['timeout'] = None
         
         job = Job.from_dict(job_data)
-        existing_job = storage.get_job(job.id)
-        if existing_job:
+        if not get_storage().insert_job_if_absent(job):
             click.echo(f"Error: Job with ID '{job.id}' already exists", err=True)
             sys.exit(1)
         
-        if storage.save_job(job):
-            click.echo(f"✓ Job '{job.id}' enqueued successfully")
-            click.echo(f"  Command: {job.command}")
-            click.echo(f"  Max retries: {job.max_retries}")
-            click.echo(f"  Priority: {job.priority}")
-            click.echo(f"  Timeout: {job.timeout if job.timeout is not None else f'{config.job_timeout} (global)'}s")
-        else:
-            click.echo("Error: Failed to enqueue job", err=True)
-            sys.exit(1)
+        click.echo(f"✓ Job '{job.id}' enqueued successfully")
+        click.echo(f"  Command: {job.command}")
+        click.echo(f"  Max retries: {job.max_retries}")
+        click.echo(f"  Priority: {job.priority}")
+        click.echo(f"  Timeout: {job.timeout if job.timeout is not None else f'{config.job_timeout} (global)'}s")
     
     except json.JSONDecodeError as e:
         click.echo(f"Error: Invalid JSON: {e}", err=True)
@@ -120,7 +132,7 @@ def worker_start(count):
         click.echo("Error: Worker count must be at least 1", err=True)
         sys.exit(1)
     
-    pids = manager.start_workers(count)
+    pids = get_manager().start_workers(count)
     if not pids:
         sys.exit(1)
 
@@ -129,7 +141,7 @@ def worker_start(count):
 @click.option('--force', '-f', is_flag=True, help='Force kill workers immediately')
 def worker_stop(force):
     """Stop all running workers."""
-    count = manager.stop_workers(graceful=not force)
+    count = get_manager().stop_workers(graceful=not force)
     if count == 0:
         sys.exit(1)
 
@@ -137,7 +149,7 @@ def worker_stop(force):
 @worker.command('status')
 def worker_status():
     """Show status of running workers."""
-    workers = manager.get_worker_status()
+    workers = get_manager().get_worker_status()
     if not workers:
         click.echo("No workers running")
         return
@@ -163,8 +175,8 @@ def worker_status():
 @cli.command()
 def status():
     """Show summary of all job states and active workers."""
-    counts = storage.get_job_counts()
-    workers = manager.get_worker_status()
+    counts = get_storage().get_job_counts()
+    workers = get_manager().get_worker_status()
     
     click.echo("\n=== QueueCTL Status ===\n")
     click.echo("Jobs by State:")
@@ -180,7 +192,7 @@ def status():
     click.echo(f"\nTotal jobs: {sum(counts.values())}")
     click.echo(f"\nActive workers: {len(workers)}")
     
-    config = storage.get_config()
+    config = get_storage().get_config()
     click.echo("\nConfiguration:")
     click.echo(f"  Max retries: {config.max_retries}")
     click.echo(f"  Backoff base: {config.backoff_base}")
@@ -200,36 +212,30 @@ def list_jobs(state, limit):
                          JobState.FAILED, JobState.DEAD]:
             click.echo(f"Error: Invalid state '{state}'", err=True)
             sys.exit(1)
-        jobs = storage.get_jobs_by_state(state)
+        jobs = get_storage().get_jobs_by_state(state, limit=limit, for_listing=True)
     else:
-        jobs = storage.get_all_jobs()
+        jobs = get_storage().get_all_jobs(limit=limit, for_listing=True)
     
     if not jobs:
         click.echo("No jobs found")
         return
     
-    jobs = jobs[:limit]
-    table_data = []
-    for job in jobs:
-        command = job.command[:37] + "..." if len(job.command) > 40 else job.command
-        error = ""
-        if job.error_message:
-            error = job.error_message[:27] + "..." if len(job.error_message) > 30 else job.error_message
-        
-        # Priority display: map numeric to human label
-        pri_map = {1: 'high', 2: 'medium', 3: 'low'}
-        priority_display = pri_map.get(getattr(job, 'priority', 2), getattr(job, 'priority', 2))
-
-        table_data.append([
+    # Priority display: map numeric to human label
+    pri_map = {1: 'high', 2: 'medium', 3: 'low'}
+    
+    table_data = (
+        [
             job.id,
-            command,
-            priority_display,
+            _truncate(job.command, 40),
+            pri_map.get(job.priority, job.priority),
             job.state,
             f"{job.attempts}/{job.max_retries}",
-            error,
+            _truncate(job.error_message, 30) or "",
             job.created_at[:19],
             job.updated_at[:19] if job.updated_at else "-"
-        ])
+        ]
+        for job in jobs
+    )
     
     click.echo("\n" + tabulate(
         table_data,
@@ -242,15 +248,22 @@ def list_jobs(state, limit):
         click.echo(f"(Limited to {limit} results. Use --limit to show more)")
 
 
+def _truncate(text, width: int):
+    """Shorten text longer than width to fit, ending it with '...'."""
+    if text and len(text) > width:
+        return text[:width - 3] + "..."
+    return text
+
+
 @cli.command('get')
 @click.argument('job_id', type=str)
 def get_job(job_id):
     """Get detailed information about a specific job."""
-    job = storage.get_job(job_id)
+    job = get_storage().get_job(job_id)
     if not job:
         click.echo(f"Error: Job '{job_id}' not found", err=True)
         sys.exit(1)
-    click.echo("\n" + job.to_json())
+    click.echo("\n" + job.to_json(indent=2))
 
 
 @cli.group(epilog="""
@@ -264,6 +277,9 @@ Examples:
 \b
   Retry a job and reset its attempt count:
     queuectl dlq retry job-id-123 -r
+\b
+  Retry every job in the DLQ:
+    queuectl dlq retry-all
 \b
   Clear all jobs from the DLQ:
     queuectl dlq clear
@@ -275,22 +291,21 @@ def dlq():
 @dlq.command('list')
 def dlq_list():
     """List all jobs in the Dead Letter Queue."""
-    jobs = storage.get_jobs_by_state(JobState.DEAD)
+    jobs = get_storage().get_jobs_by_state(JobState.DEAD, for_listing=True)
     if not jobs:
         click.echo("No jobs in DLQ")
         return
     
-    table_data = []
-    for job in jobs:
-        command = job.command[:37] + "..." if len(job.command) > 40 else job.command
-        error = (job.error_message or "")[:37] + "..." if job.error_message and len(job.error_message) > 40 else job.error_message
-        table_data.append([
+    table_data = (
+        [
             job.id,
-            command,
+            _truncate(job.command, 40),
             job.attempts,
-            error,
+            _truncate(job.error_message, 40),
             job.updated_at[:19] if job.updated_at else "-"
-        ])
+        ]
+        for job in jobs
+    )
     
     click.echo("\n" + tabulate(
         table_data,
@@ -305,7 +320,7 @@ def dlq_list():
 @click.option('--reset-attempts', '-r', is_flag=True, help='Reset attempt counter')
 def dlq_retry(job_id, reset_attempts):
     """Retry a job from the Dead Letter Queue."""
-    job = storage.get_job(job_id)
+    job = get_storage().get_job(job_id)
     if not job:
         click.echo(f"Error: Job '{job_id}' not found", err=True)
         sys.exit(1)
@@ -313,13 +328,9 @@ def dlq_retry(job_id, reset_attempts):
         click.echo(f"Error: Job '{job_id}' is not in DLQ (current state: {job.state})", err=True)
         sys.exit(1)
     
-    job.state = JobState.PENDING
-    job.error_message = None
-    job.next_retry_at = None
-    if reset_attempts:
-        job.attempts = 0
+    _reset_for_retry(job, reset_attempts)
     
-    if storage.save_job(job):
+    if get_storage().save_jobs([job]):
         click.echo(f"✓ Job '{job_id}' moved back to pending queue")
         if reset_attempts:
             click.echo(f"  Attempts reset to 0")
@@ -328,18 +339,45 @@ def dlq_retry(job_id, reset_attempts):
         sys.exit(1)
 
 
+@dlq.command('retry-all')
+@click.option('--reset-attempts', '-r', is_flag=True, help='Reset attempt counters')
+def dlq_retry_all(reset_attempts):
+    """Retry every job in the Dead Letter Queue."""
+    jobs = get_storage().get_jobs_by_state(JobState.DEAD)
+    if not jobs:
+        click.echo("No jobs in DLQ")
+        return
+    
+    for job in jobs:
+        _reset_for_retry(job, reset_attempts)
+    
+    if get_storage().save_jobs(jobs):
+        click.echo(f"✓ Moved {len(jobs)} job(s) back to pending queue")
+        if reset_attempts:
+            click.echo(f"  Attempts reset to 0")
+    else:
+        click.echo("Error: Failed to retry jobs", err=True)
+        sys.exit(1)
+
+
+def _reset_for_retry(job: Job, reset_attempts: bool):
+    """Move a DLQ job back to pending."""
+    job.state = JobState.PENDING
+    job.error_message = None
+    job.next_retry_at = None
+    if reset_attempts:
+        job.attempts = 0
+
+
 @dlq.command('clear')
 @click.confirmation_option(prompt='Are you sure you want to delete all DLQ jobs?')
 def dlq_clear():
     """Clear all jobs from the Dead Letter Queue."""
-    jobs = storage.get_jobs_by_state(JobState.DEAD)
-    count = len(jobs)
+    count = get_storage().delete_jobs_by_state(JobState.DEAD)
     if count == 0:
         click.echo("No jobs in DLQ")
         return
     
-    for job in jobs:
-        storage.delete_job(job.id)
     click.echo(f"✓ Deleted {count} job(s) from DLQ")
 
 
@@ -362,7 +400,7 @@ def config():
 @config.command('show')
 def config_show():
     """Show current configuration."""
-    cfg = storage.get_config()
+    cfg = get_storage().get_config()
     table_data = [
         ['max-retries', cfg.max_retries, 'Maximum retry attempts for failed jobs'],
         ['backoff-base', cfg.backoff_base, 'Base for exponential backoff (base^attempts)'],
@@ -400,7 +438,7 @@ def config_set(key, value):
         click.echo(f"Valid keys: {', '.join(key_map.keys())}", err=True)
         sys.exit(1)
     
-    cfg = storage.get_config()
+    cfg = get_storage().get_config()
     cfg_dict = cfg.to_dict()
     internal_key = key_map[key]
     
@@ -411,7 +449,7 @@ def config_set(key, value):
         # ----------------------------------------
         
         new_cfg = Config.from_dict(cfg_dict)
-        storage.save_config(new_cfg)
+        get_storage().save_config(new_cfg)
         
         click.echo(f"✓ Configuration updated: {key} = {cfg_dict[internal_key]}")
         click.echo(f"  Note: Restart workers for changes to take effect")
@@ -436,17 +474,14 @@ def clear_jobs(state):
                          JobState.FAILED, JobState.DEAD]:
             click.echo(f"Error: Invalid state '{state}'", err=True)
             sys.exit(1)
-        jobs = storage.get_jobs_by_state(state)
+        count = get_storage().delete_jobs_by_state(state)
     else:
-        jobs = storage.get_all_jobs()
+        count = get_storage().delete_all_jobs()
     
-    count = len(jobs)
     if count == 0:
         click.echo("No jobs to clear")
         return
     
-    for job in jobs:
-        storage.delete_job(job.id)
     click.echo(f"✓ Deleted {count} job(s)")
 
 
@@ -1,5 +1,8 @@
+import json
 import os
-from flask import Flask, jsonify, render_template
+import threading
+import time
+from flask import Flask, Response, render_template
 from .database import Storage
 from .worker_manager import WorkerManager
 
@@ -7,14 +10,79 @@ from .worker_manager import WorkerManager
 QUEUECTL_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 DB_PATH = os.path.join(QUEUECTL_ROOT, "queuectl.db")
 
+# Maximum number of jobs per state sent to the browser on each poll
+DASHBOARD_JOBS_PER_STATE = 50
+
+# How often (seconds) the background thread rebuilds the /api/status snapshot
+SNAPSHOT_INTERVAL = 1.0
+
 app = Flask(__name__)
 
+# Latest /api/status response as (http_status, json_body), kept fresh by a
+# background thread so requests never touch the database themselves
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_refresher = None
+
+# Shared per process; Storage keeps one connection per thread internally
+_storage = None
+_worker_manager = None
+_instances_lock = threading.Lock()
+
 # --- Helper Functions ---
 def get_storage():
-    return Storage(db_path=DB_PATH)
+    global _storage
+    if _storage is None:
+        with _instances_lock:
+            if _storage is None:
+                _storage = Storage(db_path=DB_PATH)
+    return _storage
 
 def get_worker_manager():
-    return WorkerManager(db_path=DB_PATH)
+    global _worker_manager
+    if _worker_manager is None:
+        with _instances_lock:
+            if _worker_manager is None:
+                _worker_manager = WorkerManager(db_path=DB_PATH)
+    return _worker_manager
+
+# --- Background Snapshot ---
+def _build_status():
+    """Build a full /api/status response body."""
+    try:
+        storage = get_storage()
+        manager = get_worker_manager()
+
+        # jobs_json is an already-serialized {"jobs": ..., "job_counts": ...}
+        # object; splice the worker list in front of its members rather
+        # than decoding and re-encoding it.
+        jobs_json = storage.get_dashboard_json(limit_per_state=DASHBOARD_JOBS_PER_STATE)
+        worker_processes = manager.get_worker_status()
+
+        body = b'{"success": true, "workers": %s, %s' % (
+            json.dumps(worker_processes).encode(), jobs_json[1:])
+        return 200, body
+    except Exception as e:
+        return 500, json.dumps({'success': False, 'error': str(e)}).encode()
+
+def _refresh_snapshot_forever():
+    global _snapshot
+    while True:
+        time.sleep(SNAPSHOT_INTERVAL)
+        snapshot = _build_status()
+        with _snapshot_lock:
+            _snapshot = snapshot
+
+def _start_refresher():
+    """Build the first snapshot and start the refresher thread, once."""
+    global _snapshot, _refresher
+    if _refresher is None:
+        with _snapshot_lock:
+            if _refresher is None:
+                _snapshot = _build_status()
+                _refresher = threading.Thread(target=_refresh_snapshot_forever,
+                                              name="dashboard-refresher", daemon=True)
+                _refresher.start()
 
 # --- Web Page Route ---
 @app.route("/")
@@ -27,28 +95,15 @@ def serve_dashboard():
 def get_status_api():
     """
     This is the API our dashboard will call to get live data.
-    """
-    try:
-        storage = get_storage()
-        job_data = storage.get_dashboard_data()
 
-        manager = get_worker_manager()
-        worker_processes = manager.get_worker_status()
-
-        return jsonify({
-            'success': True,
-            'jobs': job_data,
-            'workers': worker_processes,
-            'job_counts': {
-                'pending': len(job_data['pending']),
-                'processing': len(job_data['processing']),
-                'completed': len(job_data['completed']),
-                'failed': len(job_data['failed']),
-                'dead': len(job_data['dead']),
-            }
-        })
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    Returns the latest snapshot from the refresher thread, so the cost of
+    a poll does not depend on the size of the queue or the number of
+    open dashboards.
+    """
+    _start_refresher()
+    with _snapshot_lock:
+        status, body = _snapshot
+    return Response(body, status=status, mimetype='application/json')
 
 if __name__ == "__main__":
     print(f"Starting QueueCTL Dashboard on http://127.0.0.1:5000")
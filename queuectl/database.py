@@ -2,36 +2,313 @@
 Persistent storage layer using SQLite for job queue system.
 """
 
+import logging
+import os
 import sqlite3
 import json
 import threading
+import time
 from typing import List, Optional, Dict
 from contextlib import contextmanager
-from datetime import datetime
+
+try:
+    import orjson  # Optional: faster JSON encoding for the dashboard
+except ImportError:
+    orjson = None
 
 from .entities import Job, JobState, Config
+from .wakeup import notify_workers
+
+logger = logging.getLogger(__name__)
+
+
+# Current UTC time as an ISO-8601 "...Z" string, computed by SQLite so write
+# paths don't format timestamps in Python (millisecond precision)
+_SQL_NOW = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+# Locks older than this are considered abandoned by a crashed worker
+_SQL_LOCK_EXPIRY = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now', '-5 minutes')"
+
+
+# UPDATE ... RETURNING needs SQLite 3.35+
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Job columns in Job field order, as expected by Job.from_row
+_JOB_COLUMNS = ("id, command, state, attempts, max_retries, timeout, priority, "
+                "created_at, updated_at, next_retry_at, error_message")
+
+# Lock the next runnable job: a pending job, or a failed job whose retry is
+# due, preferring lower priority value (1 = high) then older created_at.
+# Each state is probed separately so both halves walk
+# idx_jobs_state_prio_created in order and stop at the first match; only the
+# two candidates are then compared.
+# Params: (pending, failed)
+_SQL_NEXT_JOB_ID = f"""
+        SELECT id FROM (
+            SELECT * FROM (
+                SELECT id, priority, created_at FROM jobs
+                WHERE state = ?
+                  AND (locked_by IS NULL OR locked_at < {_SQL_LOCK_EXPIRY})
+                ORDER BY priority ASC, created_at ASC
+                LIMIT 1
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT id, priority, created_at FROM jobs
+                WHERE state = ? AND (next_retry_at IS NULL OR next_retry_at <= {_SQL_NOW})
+                  AND (locked_by IS NULL OR locked_at < {_SQL_LOCK_EXPIRY})
+                ORDER BY priority ASC, created_at ASC
+                LIMIT 1
+            )
+        )
+        ORDER BY priority ASC, created_at ASC
+        LIMIT 1
+"""
+
+# Time by which a job locked now must have finished: its timeout (global
+# job_timeout if unset) plus STALE_LOCK_GRACE_SECONDS.
+# Params: (job_timeout, grace)
+_SQL_LOCK_DEADLINE = ("strftime('%Y-%m-%dT%H:%M:%fZ', 'now', "
+                      "printf('+%d seconds', COALESCE(timeout, ?) + ?))")
+
+# Params: (worker_id, job_timeout, grace, processing, pending, failed)
+_SQL_ACQUIRE_JOB = f"""
+    UPDATE jobs
+    SET locked_by = ?, locked_at = {_SQL_NOW}, locked_until = {_SQL_LOCK_DEADLINE},
+        updated_at = {_SQL_NOW}, state = ?
+    WHERE id = ({_SQL_NEXT_JOB_ID})
+"""
+
+# Hot statements are kept as constants so every call hands sqlite3 the
+# identical string and hits its prepared-statement cache.
+_SQL_ACQUIRE_JOB_RETURNING = _SQL_ACQUIRE_JOB + f"RETURNING {_JOB_COLUMNS}"
+
+_SQL_SAVE_JOB = f"""
+    INSERT OR REPLACE INTO jobs 
+    (id, command, state, attempts, max_retries, timeout, priority,
+     created_at, updated_at, next_retry_at, error_message,
+     locked_by, locked_at, locked_until)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, {_SQL_NOW}, ?, ?, NULL, NULL, NULL)
+"""
+
+# Plain insert that leaves an existing job with the same id untouched
+_SQL_INSERT_JOB = f"""
+    INSERT INTO jobs 
+    (id, command, state, attempts, max_retries, timeout, priority,
+     created_at, updated_at, next_retry_at, error_message)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, {_SQL_NOW}, ?, ?)
+    ON CONFLICT(id) DO NOTHING
+"""
+
+_SQL_GET_JOB = f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?"
+
+# LIMIT -1 means no limit in SQLite
+_SQL_GET_JOBS_BY_STATE = f"""
+    SELECT {_JOB_COLUMNS}
+    FROM jobs WHERE state = ?
+    ORDER BY priority ASC, created_at ASC
+    LIMIT ? OFFSET ?
+"""
+
+_SQL_GET_ALL_JOBS = f"""
+    SELECT {_JOB_COLUMNS}
+    FROM jobs
+    ORDER BY priority ASC, created_at DESC
+    LIMIT ? OFFSET ?
+"""
+
+# list/dlq list cut long text to 40 characters for display; reading
+# 41 is enough to tell whether a value was cut
+_LISTING_COLUMNS = _JOB_COLUMNS.replace(
+    "command", "substr(command, 1, 41)").replace(
+    "error_message", "substr(error_message, 1, 41)")
+
+_SQL_LIST_JOBS_BY_STATE = _SQL_GET_JOBS_BY_STATE.replace(_JOB_COLUMNS, _LISTING_COLUMNS)
+
+_SQL_LIST_ALL_JOBS = _SQL_GET_ALL_JOBS.replace(_JOB_COLUMNS, _LISTING_COLUMNS)
+
+# Params: (worker_id, job_timeout, grace, processing, job_id)
+_SQL_LOCK_JOB = f"""
+    UPDATE jobs
+    SET locked_by = ?, locked_at = {_SQL_NOW}, locked_until = {_SQL_LOCK_DEADLINE},
+        updated_at = {_SQL_NOW}, state = ?
+    WHERE id = ?
+"""
+
+_SQL_RELEASE_JOB = """
+    UPDATE jobs 
+    SET locked_by = NULL, locked_at = NULL, locked_until = NULL
+    WHERE id = ?
+"""
+
+# A processing job whose lock is this much older than its timeout can't still
+# be running: its worker would have killed it and released the lock
+STALE_LOCK_GRACE_SECONDS = 60
+
+# Fail processing jobs whose worker crashed mid-job: those locked by an earlier
+# run of this worker, plus any past the locked_until deadline set when they
+# were acquired, or whose lock was dropped without finishing the job,
+# whichever worker held it. The deadline is fixed at lock time so a later
+# job_timeout change can't make a live job look abandoned.
+# acquire_job only picks pending/failed rows, so nothing else reclaims these.
+# Params: (failed, processing, worker_id, locked_before)
+_SQL_RECOVER_JOBS = f"""
+    UPDATE jobs
+    SET state = ?, locked_by = NULL, locked_at = NULL, locked_until = NULL
+    WHERE state = ?
+      AND ((locked_by = ? AND locked_at < ?)
+           OR locked_at IS NULL
+           OR locked_until < {_SQL_NOW})
+"""
+
+# Record a job's outcome and drop its lock in the same write
+_SQL_FINISH_JOB = f"""
+    UPDATE jobs
+    SET state = ?, attempts = ?, error_message = ?, next_retry_at = ?,
+        locked_by = NULL, locked_at = NULL, locked_until = NULL,
+        updated_at = {_SQL_NOW}
+    WHERE id = ?
+"""
+
+
+# Connections inherited across fork(). Closing one in the child would release
+# the parent's SQLite locks and can corrupt the database, so the child keeps a
+# reference here (never used, never closed) instead of letting it be collected.
+_inherited_connections = []
+
+
+def _job_params(job: Job) -> tuple:
+    """Parameters for _SQL_SAVE_JOB and _SQL_INSERT_JOB."""
+    return (
+        job.id, job.command, job.state, job.attempts,
+        job.max_retries, job.timeout, job.priority,
+        job.created_at,
+        job.next_retry_at, job.error_message
+    )
+
+
+def _json_bytes(obj) -> bytes:
+    """Encode obj as UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
 
 
 class Storage:
     """Thread-safe SQLite storage for jobs and configuration."""
     
-    def __init__(self, db_path: str = "queuectl.db"):
-        """Initialize storage with database path."""
+    # How long (seconds) cached reads (job counts, dashboard JSON) may be served
+    CACHE_TTL = 2.0
+    
+    # Bump whenever _create_schema changes so existing databases migrate
+    SCHEMA_VERSION = 5
+    
+    # Database files whose schema this process has already set up
+    _initialized_paths = set()
+    _init_lock = threading.Lock()
+    
+    def __init__(self, db_path: str = "queuectl.db", busy_timeout_ms: int = 5000):
+        """
+        Initialize storage with database path.
+        
+        busy_timeout_ms is how long a statement waits for another
+        connection's write lock before failing with 'database is locked'.
+        """
         self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
         self._local = threading.local()
-        self._init_db()
+        # Bumped on every write made through this instance; read caches
+        # compare it to decide whether they are still valid.
+        self._generation = 0
+        self._counts_cache = None  # (cache_key, expires_at, counts)
+        self._dashboard_json_cache = None  # (cache_key, expires_at, json_bytes)
+        
+        # Schema setup only needs to run once per database per process
+        abs_path = os.path.abspath(db_path)
+        with Storage._init_lock:
+            if abs_path not in Storage._initialized_paths:
+                self._init_db()
+                Storage._initialized_paths.add(abs_path)
     
     def _get_connection(self) -> sqlite3.Connection:
-        """Get thread-local database connection."""
+        """Get thread-local database connection, opened once and reused."""
+        # A connection inherited across fork() must never be used or closed
+        # by the child; it is parked in _inherited_connections and the child
+        # opens its own instead.
+        if getattr(self._local, 'pid', None) != os.getpid():
+            inherited = self._local.__dict__.pop('connection', None)
+            if inherited is not None:
+                _inherited_connections.append(inherited)
+            self._local.pid = os.getpid()
+        
+        # Long-lived connections (dashboard, workers) would keep reading a
+        # database file that was deleted or replaced (e.g. by the example
+        # scripts' rm -f queuectl.db*); reopen on the current file instead
+        replaced = (hasattr(self._local, 'connection')
+                    and self._local.file_id != self._file_id())
+        if replaced:
+            self._local.connection.close()
+            del self._local.connection
+        
         if not hasattr(self._local, 'connection'):
             self._local.connection = sqlite3.connect(
                 self.db_path,
                 check_same_thread=False,
-                isolation_level=None  # Autocommit mode
+                isolation_level=None,  # Autocommit mode
+                cached_statements=256
             )
-            self._local.connection.row_factory = sqlite3.Row
+            self._configure_connection(self._local.connection)
+            self._local.file_id = self._file_id()
+        
+        if replaced:
+            # Cached reads belong to the old file, and the new one may need
+            # its schema created
+            self._invalidate_caches()
+            abs_path = os.path.abspath(self.db_path)
+            with Storage._init_lock:
+                Storage._initialized_paths.discard(abs_path)
+                self._init_db()
+                Storage._initialized_paths.add(abs_path)
         return self._local.connection
     
+    def _file_id(self) -> Optional[tuple]:
+        """(st_dev, st_ino) of the database file, or None if it doesn't exist."""
+        try:
+            st = os.stat(self.db_path)
+        except OSError:
+            return None
+        return (st.st_dev, st.st_ino)
+    
+    def _configure_connection(self, conn: sqlite3.Connection):
+        """Apply per-connection PRAGMAs (WAL journaling and cache tuning)."""
+        # WAL lets readers proceed while a writer commits, and with
+        # synchronous=NORMAL a commit no longer fsyncs the main database file.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        # Upper bound only: pages are allocated as they are read
+        conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+    
+    def _invalidate_caches(self):
+        """Mark cached reads stale after a write."""
+        self._generation += 1
+    
+    def _cache_key(self) -> tuple:
+        """
+        Return a value that changes whenever the jobs data may have changed.
+        
+        Combines the local write generation with SQLite's data_version, which
+        moves when another connection (e.g. a worker process) commits. The
+        data_version is only comparable within one connection, so the
+        connection identity is part of the key.
+        """
+        conn = self._get_connection()
+        with self._get_cursor() as cursor:
+            cursor.execute("PRAGMA data_version")
+            return (self._generation, id(conn), cursor.fetchone()[0])
+    
     @contextmanager
     def _get_cursor(self):
         """Context manager for database cursor."""
@@ -42,184 +319,297 @@ class Storage:
         finally:
             cursor.close()
     
+    def _get_schema_version(self, cursor) -> int:
+        """Return the schema version recorded in the database header (0 if none)."""
+        cursor.execute("PRAGMA user_version")
+        return cursor.fetchone()[0]
+    
     def _init_db(self):
-        """Initialize database schema."""
+        """Initialize database schema, skipping it if already up to date."""
         with self._get_cursor() as cursor:
-            # Jobs table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS jobs (
-                    id TEXT PRIMARY KEY,
-                    command TEXT NOT NULL,
-                    state TEXT NOT NULL,
-                    attempts INTEGER DEFAULT 0,
-                    max_retries INTEGER DEFAULT 3,
-                    timeout INTEGER DEFAULT NULL,
-                    priority INTEGER DEFAULT 2,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    next_retry_at TEXT,
-                    error_message TEXT,
-                    locked_by TEXT,
-                    locked_at TEXT
-                )
-            """)
-            
-            # Configuration table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS config (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL
-                )
-            """)
+            if self._get_schema_version(cursor) >= self.SCHEMA_VERSION:
+                return
             
-            # Create indexes for performance
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_jobs_state 
-                ON jobs(state)
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_jobs_next_retry 
-                ON jobs(next_retry_at) 
-                WHERE next_retry_at IS NOT NULL
-            """)
+            # Take the write lock so concurrent starters migrate only once
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                if self._get_schema_version(cursor) < self.SCHEMA_VERSION:
+                    self._create_schema(cursor)
+                    # PRAGMA values can't be bound as parameters
+                    cursor.execute(f"PRAGMA user_version={int(self.SCHEMA_VERSION)}")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+    
+    def _create_schema(self, cursor):
+        """Create tables and indexes and migrate older databases."""
+        # Jobs table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                command TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER DEFAULT 0,
+                max_retries INTEGER DEFAULT 3,
+                timeout INTEGER DEFAULT NULL,
+                priority INTEGER DEFAULT 2,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                next_retry_at TEXT,
+                error_message TEXT,
+                locked_by TEXT,
+                locked_at TEXT,
+                locked_until TEXT
+            )
+        """)
+        
+        # Configuration table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS config (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        
+        # Create indexes for performance
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_next_retry 
+            ON jobs(next_retry_at) 
+            WHERE next_retry_at IS NOT NULL
+        """)
+        
+        # Lets acquire_job and per-state listings read jobs already in
+        # (priority, created_at) order instead of sorting them
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_state_prio_created
+            ON jobs(state, priority, created_at)
+        """)
+        
+        # Dashboard reads the most recently updated jobs of each state
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_state_updated
+            ON jobs(state, updated_at)
+        """)
+        
+        # Startup recovery looks up one worker's processing jobs
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_state_locked
+            ON jobs(state, locked_by, locked_at)
+        """)
+        
+        # Superseded by the composite indexes above, which lead with state
+        cursor.execute("DROP INDEX IF EXISTS idx_jobs_state")
+        # Only served the MAX(updated_at) probe of the old status cache
+        cursor.execute("DROP INDEX IF EXISTS idx_jobs_updated_at")
 
-            # Migrate existing databases: add timeout and priority columns if missing
-            cursor.execute("PRAGMA table_info(jobs)")
-            cols = {r[1] for r in cursor.fetchall()}  # name is at index 1
-            if 'timeout' not in cols:
-                try:
-                    cursor.execute("ALTER TABLE jobs ADD COLUMN timeout INTEGER DEFAULT NULL")
-                except Exception:
-                    # Best-effort migration
-                    pass
-            if 'priority' not in cols:
-                try:
-                    cursor.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER DEFAULT 2")
-                except Exception:
-                    pass
+        # The schema version used to be kept as a config row; it now lives in
+        # PRAGMA user_version so config holds Config keys only
+        cursor.execute("DELETE FROM config WHERE key = 'schema_version'")
+
+        # Migrate existing databases: add timeout and priority columns if missing
+        cursor.execute("PRAGMA table_info(jobs)")
+        cols = {r[1] for r in cursor.fetchall()}  # name is at index 1
+        if 'timeout' not in cols:
+            try:
+                cursor.execute("ALTER TABLE jobs ADD COLUMN timeout INTEGER DEFAULT NULL")
+            except Exception:
+                # Best-effort migration
+                pass
+        if 'priority' not in cols:
+            try:
+                cursor.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER DEFAULT 2")
+            except Exception:
+                pass
+        if 'locked_until' not in cols:
+            cursor.execute("ALTER TABLE jobs ADD COLUMN locked_until TEXT")
+            # Give jobs locked before the upgrade the deadline recovery used
+            # to compute, using the stored job_timeout
+            cursor.execute("""
+                UPDATE jobs
+                SET locked_until = strftime('%Y-%m-%dT%H:%M:%fZ', locked_at,
+                    printf('+%d seconds', COALESCE(timeout,
+                        (SELECT CAST(value AS INTEGER) FROM config WHERE key = 'job_timeout'),
+                        ?) + ?))
+                WHERE locked_at IS NOT NULL
+            """, (Config().job_timeout, STALE_LOCK_GRACE_SECONDS))
     
     def save_job(self, job: Job) -> bool:
         """Save or update a job."""
         try:
-            job.updated_at = datetime.utcnow().isoformat() + "Z"
-            
             with self._get_cursor() as cursor:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO jobs 
-                    (id, command, state, attempts, max_retries, timeout, priority,
-                     created_at, updated_at, next_retry_at, error_message,
-                     locked_by, locked_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL)
-                """, (
-                    job.id, job.command, job.state, job.attempts,
-                    job.max_retries, job.timeout, job.priority,
-                    job.created_at, job.updated_at,
-                    job.next_retry_at, job.error_message
-                ))
+                cursor.execute(_SQL_SAVE_JOB, _job_params(job))
+            self._invalidate_caches()
             return True
         except Exception as e:
             print(f"Error saving job: {e}")
             return False
     
+    def insert_job_if_absent(self, job: Job) -> bool:
+        """
+        Insert a new job in one statement.
+        
+        Returns False, without modifying anything, if a job with the same
+        id already exists.
+        """
+        with self._get_cursor() as cursor:
+            cursor.execute(_SQL_INSERT_JOB, _job_params(job))
+            inserted = cursor.rowcount == 1
+        if inserted:
+            self._invalidate_caches()
+            notify_workers(self.db_path)
+        return inserted
+    
+    def save_jobs(self, jobs: List[Job]) -> bool:
+        """Save or update several jobs in a single transaction."""
+        if not jobs:
+            return True
+        try:
+            with self._get_cursor() as cursor:
+                cursor.execute("BEGIN IMMEDIATE")
+                try:
+                    cursor.executemany(_SQL_SAVE_JOB, [_job_params(job) for job in jobs])
+                    cursor.execute("COMMIT")
+                except Exception:
+                    cursor.execute("ROLLBACK")
+                    raise
+            self._invalidate_caches()
+            notify_workers(self.db_path)
+            return True
+        except Exception as e:
+            print(f"Error saving jobs: {e}")
+            return False
+    
     def get_job(self, job_id: str) -> Optional[Job]:
         """Retrieve a job by ID."""
         with self._get_cursor() as cursor:
-            cursor.execute("""
-                SELECT id, command, state, attempts, max_retries, timeout, priority,
-                       created_at, updated_at, next_retry_at, error_message
-                FROM jobs WHERE id = ?
-            """, (job_id,))
+            cursor.execute(_SQL_GET_JOB, (job_id,))
             
             row = cursor.fetchone()
             if row:
-                return Job(**dict(row))
+                return Job.from_row(row)
             return None
     
-    def get_jobs_by_state(self, state: str) -> List[Job]:
-        """Get all jobs in a specific state."""
+    def get_jobs_by_state(self, state: str, limit: Optional[int] = None,
+                          offset: int = 0, for_listing: bool = False) -> List[Job]:
+        """
+        Get jobs in a specific state, optionally paginated.
+        
+        With for_listing=True, command and error_message are cut to their
+        first 41 characters in SQL, which is all the table views display.
+        """
+        sql = _SQL_LIST_JOBS_BY_STATE if for_listing else _SQL_GET_JOBS_BY_STATE
         with self._get_cursor() as cursor:
-            cursor.execute("""
-                SELECT id, command, state, attempts, max_retries, timeout, priority,
-                       created_at, updated_at, next_retry_at, error_message
-                FROM jobs WHERE state = ?
-                ORDER BY priority ASC, created_at ASC
-            """, (state,))
+            cursor.execute(sql, (state, limit if limit is not None else -1, offset))
             
-            return [Job(**dict(row)) for row in cursor.fetchall()]
+            return [Job.from_row(row) for row in cursor.fetchall()]
     
-    def get_all_jobs(self) -> List[Job]:
-        """Get all jobs."""
+    def get_all_jobs(self, limit: Optional[int] = None, offset: int = 0,
+                     for_listing: bool = False) -> List[Job]:
+        """Get all jobs, optionally paginated (see get_jobs_by_state)."""
+        sql = _SQL_LIST_ALL_JOBS if for_listing else _SQL_GET_ALL_JOBS
         with self._get_cursor() as cursor:
-            cursor.execute("""
-                SELECT id, command, state, attempts, max_retries, timeout, priority,
-                       created_at, updated_at, next_retry_at, error_message
-                FROM jobs
-                ORDER BY priority ASC, created_at DESC
-            """)
+            cursor.execute(sql, (limit if limit is not None else -1, offset))
             
-            return [Job(**dict(row)) for row in cursor.fetchall()]
+            return [Job.from_row(row) for row in cursor.fetchall()]
     
-    def acquire_job(self, worker_id: str) -> Optional[Job]:
+    def acquire_job(self, worker_id: str, job_timeout: int) -> Optional[Job]:
         """
         Atomically acquire a pending job for processing.
+        
+        job_timeout (the global config value) sets the lock deadline of jobs
+        without their own timeout; see recover_worker_jobs.
         Returns the job if successfully acquired, None otherwise.
         """
-        now = datetime.utcnow().isoformat() + "Z"
+        params = (worker_id, job_timeout, STALE_LOCK_GRACE_SECONDS,
+                  JobState.PROCESSING, JobState.PENDING, JobState.FAILED)
         
         with self._get_cursor() as cursor:
-            # Start transaction
-            cursor.execute("BEGIN EXCLUSIVE")
-
             try:
-                # Find a pending job or a failed job ready for retry.
-                # Prefer lower priority value (1 = high) then older created_at.
-                cursor.execute("""
-                    SELECT id, command, state, attempts, max_retries, timeout, priority,
-                           created_at, updated_at, next_retry_at, error_message
-                    FROM jobs
-                    WHERE (state = ? OR (state = ? AND (next_retry_at IS NULL OR next_retry_at <= ?)))
-                      AND (locked_by IS NULL OR locked_at < datetime('now', '-5 minutes'))
-                    ORDER BY priority ASC, created_at ASC
-                    LIMIT 1
-                """, (JobState.PENDING, JobState.FAILED, now))
-
-                row = cursor.fetchone()
-
-                if row:
-                    job = Job(**dict(row))
-
-                    # Lock the job
-                    cursor.execute("""
-                        UPDATE jobs 
-                        SET locked_by = ?, locked_at = ?, state = ?
-                        WHERE id = ?
-                    """, (worker_id, now, JobState.PROCESSING, job.id))
-
-                    cursor.execute("COMMIT")
-
-                    job.state = JobState.PROCESSING
-                    return job
+                if _HAS_RETURNING:
+                    # Lookup and lock happen in one statement, which holds
+                    # the write lock only for its own duration.
+                    cursor.execute(_SQL_ACQUIRE_JOB_RETURNING, params)
+                    row = cursor.fetchone()
                 else:
-                    cursor.execute("COMMIT")
-                    return None
-
+                    row = self._acquire_job_in_transaction(cursor, params)
             except Exception as e:
-                cursor.execute("ROLLBACK")
-                print(f"Error acquiring job: {e}")
+                logger.error(f"[Worker {worker_id}] Error acquiring job: {e}")
                 return None
+        
+        if row:
+            self._invalidate_caches()
+            return Job.from_row(row)
+        return None
+    
+    def _acquire_job_in_transaction(self, cursor, params: tuple):
+        """acquire_job for SQLite < 3.35, which lacks UPDATE ... RETURNING."""
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute(_SQL_NEXT_JOB_ID, params[4:])
+            row = cursor.fetchone()
+            if row:
+                job_id = row[0]
+                cursor.execute(_SQL_LOCK_JOB, params[:4] + (job_id,))
+                cursor.execute(_SQL_GET_JOB, (job_id,))
+                row = cursor.fetchone()
+            cursor.execute("COMMIT")
+            return row
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
     
     def release_job(self, job_id: str):
         """Release job lock."""
         with self._get_cursor() as cursor:
-            cursor.execute("""
-                UPDATE jobs 
-                SET locked_by = NULL, locked_at = NULL
-                WHERE id = ?
-            """, (job_id,))
+            cursor.execute(_SQL_RELEASE_JOB, (job_id,))
+        self._invalidate_caches()
+    
+    def recover_worker_jobs(self, worker_id: str, locked_before: str) -> int:
+        """
+        Mark processing jobs abandoned by crashed workers as failed.
+        
+        Recovers jobs this worker locked before locked_before, and jobs of
+        any worker past the locked_until deadline stored when they were
+        acquired (their timeout plus STALE_LOCK_GRACE_SECONDS). Jobs held by
+        live workers are left alone. Returns the number recovered.
+        """
+        with self._get_cursor() as cursor:
+            cursor.execute(_SQL_RECOVER_JOBS, (
+                JobState.FAILED, JobState.PROCESSING, worker_id, locked_before,
+            ))
+            recovered = cursor.rowcount
+        if recovered:
+            self._invalidate_caches()
+        return recovered
+    
+    def finish_job(self, job: Job) -> bool:
+        """
+        Store the result of an executed job and release its lock.
+        
+        One UPDATE (and so one commit) instead of save_job + release_job.
+        Returns False (and logs the error) if the write failed.
+        """
+        try:
+            with self._get_cursor() as cursor:
+                cursor.execute(_SQL_FINISH_JOB, (
+                    job.state, job.attempts, job.error_message,
+                    job.next_retry_at, job.id,
+                ))
+            self._invalidate_caches()
+            return True
+        except Exception as e:
+            logger.error(f"Error finishing job {job.id}: {e}")
+            return False
     
     def get_job_counts(self) -> Dict[str, int]:
-        """Get count of jobs by state."""
+        """Get count of jobs by state (cached for CACHE_TTL seconds)."""
+        key = self._cache_key()
+        now = time.monotonic()
+        cached = self._counts_cache
+        if cached and cached[0] == key and cached[1] > now:
+            return dict(cached[2])
+        
         with self._get_cursor() as cursor:
             cursor.execute("""
                 SELECT state, COUNT(*) as count
@@ -227,7 +617,7 @@ class Storage:
                 GROUP BY state
             """)
             
-            counts = {row['state']: row['count'] for row in cursor.fetchall()}
+            counts = {state: count for state, count in cursor.fetchall()}
             
             # Ensure all states are present
             for state in [JobState.PENDING, JobState.PROCESSING, 
@@ -235,26 +625,62 @@ class Storage:
                 if state not in counts:
                     counts[state] = 0
             
-            return counts
+            self._counts_cache = (key, now + self.CACHE_TTL, counts)
+            return dict(counts)
     
     def delete_job(self, job_id: str) -> bool:
         """Delete a job."""
         try:
             with self._get_cursor() as cursor:
                 cursor.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self._invalidate_caches()
             return True
         except Exception as e:
             print(f"Error deleting job: {e}")
             return False
     
+    def delete_jobs_by_state(self, state: str) -> int:
+        """Delete all jobs in a specific state. Returns the number deleted."""
+        with self._get_cursor() as cursor:
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute("DELETE FROM jobs WHERE state = ?", (state,))
+                count = cursor.rowcount
+                cursor.execute("COMMIT")
+                self._invalidate_caches()
+                return count
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+    
+    def delete_all_jobs(self) -> int:
+        """Delete every job. Returns the number deleted."""
+        with self._get_cursor() as cursor:
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                cursor.execute("DELETE FROM jobs")
+                count = cursor.rowcount
+                cursor.execute("COMMIT")
+                self._invalidate_caches()
+                return count
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+    
     def save_config(self, config: Config):
         """Save configuration."""
+        rows = [(key, json.dumps(value)) for key, value in config.to_dict().items()]
         with self._get_cursor() as cursor:
-            for key, value in config.to_dict().items():
-                cursor.execute("""
+            cursor.execute("BEGIN")
+            try:
+                cursor.executemany("""
                     INSERT OR REPLACE INTO config (key, value)
                     VALUES (?, ?)
-                """, (key, json.dumps(value)))
+                """, rows)
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
     
     def get_config(self) -> Config:
         """Load configuration."""
@@ -268,18 +694,22 @@ class Storage:
                 self.save_config(config)
                 return config
             
-            config_dict = {row['key']: json.loads(row['value']) for row in rows}
+            config_dict = {key: json.loads(value) for key, value in rows}
             return Config.from_dict(config_dict)
     
     def close(self):
         """Close database connection."""
         if hasattr(self._local, 'connection'):
             self._local.connection.close()
+            del self._local.connection
 
-            # Inside your Storage class in database.py
-
-    def get_dashboard_data(self) -> dict:
-        """Fetches all jobs for the dashboard."""
+    def get_dashboard_summary(self, limit_per_state: int = 50) -> dict:
+        """
+        Fetch job counts plus the most recently updated jobs of each state.
+        
+        Only `limit_per_state` rows are read per state, so the cost does not
+        grow with the size of the jobs table.
+        """
         jobs_by_state = {
             'pending': [],
             'processing': [],
@@ -289,13 +719,39 @@ class Storage:
         }
         
         try:
+            job_counts = self.get_job_counts()
             with self._get_cursor() as cursor:
-                cursor.execute("SELECT * FROM jobs ORDER BY updated_at DESC")
-                for row in cursor.fetchall():
-                    job = Job(**dict(row))
-                    if job.state in jobs_by_state:
-                        jobs_by_state[job.state].append(job.to_dict())
-            return jobs_by_state
+                for state, jobs in jobs_by_state.items():
+                    if not job_counts.get(state):
+                        continue
+                    cursor.execute(f"""
+                        SELECT {_JOB_COLUMNS}, locked_by, locked_at
+                        FROM jobs WHERE state = ?
+                        ORDER BY updated_at DESC
+                        LIMIT ?
+                    """, (state, limit_per_state))
+                    # Iterate the cursor directly; no intermediate row list
+                    for row in cursor:
+                        jobs.append(Job.from_row(row).to_dict())
+            return {'jobs': jobs_by_state, 'job_counts': job_counts}
         except Exception as e:
             print(f"Error fetching dashboard data: {e}")
-            return jobs_by_state
\ No newline at end of file
+            return {'jobs': jobs_by_state,
+                    'job_counts': {state: 0 for state in jobs_by_state}}
+    
+    def get_dashboard_json(self, limit_per_state: int = 50) -> bytes:
+        """
+        Return get_dashboard_summary() serialized as a JSON object.
+        
+        The serialized string is reused until a write is seen or CACHE_TTL
+        expires, so repeated polls skip both the queries and the encoding.
+        """
+        key = (self._cache_key(), limit_per_state)
+        now = time.monotonic()
+        cached = self._dashboard_json_cache
+        if cached and cached[0] == key and cached[1] > now:
+            return cached[2]
+        
+        payload = _json_bytes(self.get_dashboard_summary(limit_per_state))
+        self._dashboard_json_cache = (key, now + self.CACHE_TTL, payload)
+        return payload
\ No newline at end of file
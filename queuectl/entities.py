@@ -2,10 +2,38 @@
 Data models for QueueCTL job queue system.
 """
 
-from dataclasses import dataclass, asdict, fields
-from datetime import datetime
-from typing import Optional
+from dataclasses import dataclass, fields
+from typing import Iterable, List, Optional
 import json
+import time
+
+try:
+    import msgpack  # Optional: compact binary transport for jobs
+except ImportError:
+    msgpack = None
+
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") of the last timestamp formatted
+_iso_second_cache = (None, "")
+
+
+def _utcnow_iso(offset_seconds: float = 0) -> str:
+    """
+    Current UTC time (plus offset_seconds) as "YYYY-MM-DDTHH:MM:SS.ffffffZ".
+    
+    Same layout as datetime.utcnow().isoformat() + "Z", except the
+    microseconds are always present. Calls within the same second reuse
+    the formatted date/time part, so only the fraction is formatted.
+    """
+    global _iso_second_cache
+    ns = time.time_ns() + int(offset_seconds * 1_000_000_000)
+    seconds, ns = divmod(ns, 1_000_000_000)
+    # Read the cache once: another thread may replace it meanwhile
+    cached = _iso_second_cache
+    if cached[0] != seconds:
+        cached = (seconds, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)))
+        _iso_second_cache = cached
+    return f"{cached[1]}.{ns // 1000:06d}Z"
 
 
 class JobState:
@@ -40,39 +68,82 @@ class Job:
     
     def __post_init__(self):
         """Initialize timestamps if not provided."""
-        now = datetime.utcnow().isoformat() + "Z"
-        if self.created_at is None:
-            self.created_at = now
-        if self.updated_at is None:
-            self.updated_at = now
+        # Rows loaded from the database already carry both timestamps
+        if self.created_at is None or self.updated_at is None:
+            now = _utcnow_iso()
+            if self.created_at is None:
+                self.created_at = now
+            if self.updated_at is None:
+                self.updated_at = now
     
     def to_dict(self) -> dict:
         """
         Returns a dictionary representation of the job.
         """
-        return asdict(self)
+        # Every field is a scalar, so a flat projection replaces asdict's deepcopy
+        return {name: getattr(self, name) for name in self._FIELDS}
     
-    def to_json(self) -> str:
-        """Convert job to JSON string."""
-        return json.dumps(self.to_dict(), indent=2)
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """Convert job to JSON string (compact unless indent is given)."""
+        if indent is None:
+            return json.dumps(self.to_dict(), separators=(',', ':'))
+        return json.dumps(self.to_dict(), indent=indent)
+    
+    def to_msgpack(self) -> bytes:
+        """Convert job to msgpack bytes (requires the msgpack package)."""
+        if msgpack is None:
+            raise ImportError("msgpack is not installed (pip install queuectl[msgpack])")
+        return msgpack.packb(self.to_dict(), use_bin_type=True)
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Job':
-        """Create job from dictionary."""
+        """Create job from dictionary, ignoring unknown keys."""
+        return cls(**{k: data[k] for k in data.keys() & _JOB_FIELDS})
+    
+    @classmethod
+    def bulk_new(cls, items: Iterable[dict]) -> List['Job']:
+        """
+        Create many new jobs from dictionaries, stamped with one shared time.
         
-        # --- THIS IS THE FIX ---
-        # We just need the set of field names, which are the keys of the dict
-        known_keys = set(cls.__dataclass_fields__.keys())
-        # --- END OF FIX ---
-
-        filtered_data = {k: v for k, v in data.items() if k in known_keys}
-        return cls(**filtered_data)
+        Each dictionary is filtered like from_dict; timestamps it supplies
+        are kept.
+        """
+        now = _utcnow_iso()
+        jobs = []
+        for data in items:
+            kwargs = {k: data[k] for k in data.keys() & _JOB_FIELDS}
+            kwargs.setdefault('created_at', now)
+            kwargs.setdefault('updated_at', now)
+            jobs.append(cls(**kwargs))
+        return jobs
+    
+    @classmethod
+    def from_row(cls, row: tuple) -> 'Job':
+        """
+        Create job from a database row whose columns follow field order.
+        
+        Trailing fields may be omitted and keep their defaults.
+        """
+        return cls(*row)
     
     @classmethod
     def from_json(cls, json_str: str) -> 'Job':
         """Create job from JSON string."""
         data = json.loads(json_str)
         return cls.from_dict(data)
+    
+    @classmethod
+    def from_msgpack(cls, packed: bytes) -> 'Job':
+        """Create job from msgpack bytes (requires the msgpack package)."""
+        if msgpack is None:
+            raise ImportError("msgpack is not installed (pip install queuectl[msgpack])")
+        return cls.from_dict(msgpack.unpackb(packed, raw=False))
+
+
+# Field names in declaration order, for to_dict
+Job._FIELDS = tuple(f.name for f in fields(Job))
+# Same names as a set, for filtering from_dict input
+_JOB_FIELDS = frozenset(Job.__dataclass_fields__)
 
 
 @dataclass
@@ -87,12 +158,13 @@ class Config:
         """
         Convert config to dictionary.
         """
-        return asdict(self)
+        return {name: getattr(self, name) for name in self._FIELDS}
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Config':
-        """Create config from dictionary."""
-        # This one also needs to be safe
-        known_keys = set(cls.__dataclass_fields__.keys())
-        filtered_data = {k: v for k, v in data.items() if k in known_keys}
-        return cls(**filtered_data)
\ No newline at end of file
+        """Create config from dictionary, ignoring unknown keys."""
+        return cls(**{k: data[k] for k in data.keys() & _CONFIG_FIELDS})
+
+
+Config._FIELDS = tuple(f.name for f in fields(Config))
+_CONFIG_FIELDS = frozenset(Config.__dataclass_fields__)
@@ -0,0 +1,106 @@
+"""
+Cross-process wakeup for idle workers.
+
+Each idle worker binds a Unix datagram socket in a shared directory next to
+the database; enqueueing sends a byte to every socket found there so the
+worker can pick the job up immediately instead of waiting out its poll
+interval.
+"""
+
+import os
+import select
+import socket
+from typing import Optional
+
+
+WAKEUP_DIR_NAME = ".queuectl_wakeup"
+
+
+def wakeup_dir(db_path: str) -> str:
+    """Directory holding the wakeup sockets for a given database."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), WAKEUP_DIR_NAME)
+
+
+class WakeupListener:
+    """Datagram socket an idle worker blocks on until there is new work."""
+    
+    def __init__(self, db_path: str, name: str):
+        """Bind the worker's wakeup socket (raises OSError if unavailable)."""
+        directory = wakeup_dir(db_path)
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}.sock")
+        
+        # A worker that crashed may have left its socket behind
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        
+        self.sock: Optional[socket.socket] = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            self.sock.bind(self.path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.sock.setblocking(False)
+    
+    def wait(self, timeout: float) -> bool:
+        """Block until notified or timeout expires. Returns True if notified."""
+        try:
+            ready, _, _ = select.select([self.sock], [], [], timeout)
+        except InterruptedError:
+            return False
+        if not ready:
+            return False
+        
+        # Collapse any burst of notifications into a single wakeup
+        while True:
+            try:
+                self.sock.recv(64)
+            except (BlockingIOError, InterruptedError):
+                break
+        return True
+    
+    def close(self):
+        """Close the socket and remove it from the wakeup directory."""
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def notify_workers(db_path: str):
+    """Wake every idle worker listening on this database. Never raises."""
+    directory = wakeup_dir(db_path)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    
+    sock = None
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        for name in names:
+            if not name.endswith(".sock"):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                sock.sendto(b"\0", path)
+            except BlockingIOError:
+                # Socket buffer full: the worker already has a wakeup pending
+                pass
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody is bound to it any more
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError:
+                pass
+    except (OSError, AttributeError):
+        pass
+    finally:
+        if sock is not None:
+            sock.close()
@@ -2,16 +2,38 @@
 Worker process implementation for job execution.
 """
 
+import logging
+import logging.handlers
 import os
+import queue
 import signal
 import subprocess
+import tempfile
+import threading
 import time
 import sys
-from datetime import datetime, timedelta
 from typing import Optional
 
-from .entities import Job, JobState, Config
+from .entities import Job, JobState, Config, _utcnow_iso
 from .database import Storage
+from .wakeup import WakeupListener
+
+
+logger = logging.getLogger(__name__)
+package_logger = logging.getLogger(__package__)
+
+# How long (ms) a worker waits on a locked database before giving up
+WORKER_BUSY_TIMEOUT_MS = 30000
+
+# Per-worker log files live in this directory next to the database
+LOG_DIR_NAME = ".queuectl_logs"
+# Each log is rotated once it reaches this size (one old file is kept)
+LOG_MAX_BYTES = 5 * 1024 * 1024
+
+# Only the end of a failed job's output is read back (for error_message)
+OUTPUT_TAIL_BYTES = 64 * 1024
+# Successful jobs only get this much of their output logged
+OUTPUT_EXCERPT_BYTES = 200
 
 
 class Worker:
@@ -20,7 +42,9 @@ class Worker:
     def __init__(self, worker_id: str, db_path: str = "queuectl.db"):
         """Initialize worker."""
         self.worker_id = worker_id
-        self.storage = Storage(db_path)
+        # One connection for the worker's lifetime; wait generously for the
+        # write lock since losing a job-state update is worse than stalling
+        self.storage = Storage(db_path, busy_timeout_ms=WORKER_BUSY_TIMEOUT_MS)
         self.config = self.storage.get_config()
         self.running = False
         self.current_job: Optional[Job] = None
@@ -31,25 +55,30 @@ class Worker:
     
     def _handle_shutdown(self, signum, frame):
         """Handle shutdown signals gracefully."""
-        print(f"[Worker {self.worker_id}] Received shutdown signal, finishing current job...")
+        logger.info(f"[Worker {self.worker_id}] Received shutdown signal, finishing current job...")
         self.running = False
     
     def start(self):
         """Start the worker loop."""
         self.running = True
-        print(f"[Worker {self.worker_id}] Started")
+        started_at = _utcnow_iso()
+        logger.info(f"[Worker {self.worker_id}] Started")
 
-        # 🛠️ Auto-recover jobs stuck in 'processing' (crashed workers)
+        # 🛠️ Auto-recover jobs left in 'processing' by a crash: our own from a
+        # previous run, and anyone's whose lock has outlived the job's timeout
         try:
-            with self.storage._get_cursor() as cursor:
-                cursor.execute("""
-                    UPDATE jobs
-                    SET state='failed', locked_by=NULL, locked_at=NULL
-                    WHERE state='processing'
-                """)
-            print(f"[Worker {self.worker_id}] Recovered any stuck jobs from previous runs")
+            recovered = self.storage.recover_worker_jobs(self.worker_id, started_at)
+            if recovered:
+                logger.info(f"[Worker {self.worker_id}] Recovered {recovered} stuck job(s) from crashed workers")
         except Exception as e:
-            print(f"[Worker {self.worker_id}] Error recovering stuck jobs: {e}")
+            logger.error(f"[Worker {self.worker_id}] Error recovering stuck jobs: {e}")
+        
+        # Enqueue wakes us through this socket; without it we fall back to plain polling
+        try:
+            listener = WakeupListener(self.storage.db_path, self.worker_id)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"[Worker {self.worker_id}] Wakeup socket unavailable, polling only: {e}")
+            listener = None
         
         try:
             while self.running:
@@ -57,29 +86,35 @@ class Worker:
                 self.config = self.storage.get_config()
                 
                 # Try to acquire a job
-                job = self.storage.acquire_job(self.worker_id)
+                job = self.storage.acquire_job(self.worker_id, self.config.job_timeout)
                 
                 if job:
                     self.current_job = job
                     self._execute_job(job)
                     self.current_job = None
+                elif listener:
+                    # No jobs available; the poll interval is only a safety net
+                    # for retries coming due and enqueues that missed us
+                    listener.wait(self.config.worker_poll_interval)
                 else:
                     # No jobs available, sleep
                     time.sleep(self.config.worker_poll_interval)
         
         except Exception as e:
-            print(f"[Worker {self.worker_id}] Error: {e}")
+            logger.error(f"[Worker {self.worker_id}] Error: {e}")
         
         finally:
             # Release any locked job if interrupted
             if self.current_job:
                 self.storage.release_job(self.current_job.id)
+            if listener:
+                listener.close()
             self.storage.close()
-            print(f"[Worker {self.worker_id}] Stopped")
+            logger.info(f"[Worker {self.worker_id}] Stopped")
     
     def _execute_job(self, job: Job):
         """Execute a job."""
-        print(f"[Worker {self.worker_id}] Executing job {job.id}: {job.command}")
+        logger.info(f"[Worker {self.worker_id}] Executing job {job.id}: {job.command}")
         
         job.attempts += 1
         start_time = time.time()
@@ -88,30 +123,31 @@ class Worker:
             # Determine timeout: per-job if set, otherwise global config
             timeout_secs = job.timeout if getattr(job, 'timeout', None) is not None else self.config.job_timeout
 
-            # Execute the command
-            result = subprocess.run(
-                job.command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=timeout_secs
-            )
-            
-            execution_time = time.time() - start_time
-            
-            if result.returncode == 0:
-                # Success
-                job.state = JobState.COMPLETED
-                job.error_message = None
-                print(f"[Worker {self.worker_id}] Job {job.id} completed successfully "
-                      f"in {execution_time:.2f}s")
+            # Jobs write stdout+stderr straight to a temp file instead of
+            # through pipes into Python strings. Each job gets its own file:
+            # background processes left behind by an earlier job may still
+            # hold that job's file open and write to it.
+            with tempfile.TemporaryFile(prefix=f"queuectl-{self.worker_id}-") as output_file:
+                # Execute the command
+                returncode = _run_command(job.command, timeout_secs, output_file)
                 
-                if result.stdout:
-                    print(f"[Worker {self.worker_id}] Output: {result.stdout.strip()}")
-            else:
-                # Failed
-                error_msg = result.stderr.strip() if result.stderr else f"Exit code: {result.returncode}"
-                self._handle_job_failure(job, error_msg)
+                execution_time = time.time() - start_time
+                
+                if returncode == 0:
+                    # Success
+                    job.state = JobState.COMPLETED
+                    job.error_message = None
+                    logger.info(f"[Worker {self.worker_id}] Job {job.id} completed successfully "
+                                f"in {execution_time:.2f}s")
+                    
+                    excerpt = _read_tail(output_file, OUTPUT_EXCERPT_BYTES).strip()
+                    if excerpt:
+                        logger.info(f"[Worker {self.worker_id}] Output: {excerpt}")
+                else:
+                    # Failed
+                    output = _read_tail(output_file, OUTPUT_TAIL_BYTES).strip()
+                    error_msg = output if output else f"Exit code: {returncode}"
+                    self._handle_job_failure(job, error_msg)
         
         except subprocess.TimeoutExpired:
             # Job exceeded its allowed time
@@ -124,12 +160,9 @@ class Worker:
             self._handle_job_failure(job, error_msg)
         
         finally:
-            # 🛠️ Defensive save and unlock
-            try:
-                self.storage.save_job(job)
-                self.storage.release_job(job.id)
-            except Exception as e:
-                print(f"[Worker {self.worker_id}] Warning: failed to save or release job {job.id}: {e}")
+            # 🛠️ Defensive save and unlock (one commit)
+            if not self.storage.finish_job(job):
+                logger.warning(f"[Worker {self.worker_id}] Warning: failed to save or release job {job.id}")
     
     def _handle_job_failure(self, job: Job, error_message: str):
         """Handle job failure with retry logic."""
@@ -139,23 +172,150 @@ class Worker:
             # Move to DLQ
             job.state = JobState.DEAD
             job.next_retry_at = None
-            print(f"[Worker {self.worker_id}] Job {job.id} failed permanently "
-                  f"after {job.attempts} attempts, moving to DLQ")
-            print(f"[Worker {self.worker_id}] Error: {error_message}")
+            logger.warning(f"[Worker {self.worker_id}] Job {job.id} failed permanently "
+                           f"after {job.attempts} attempts, moving to DLQ")
+            logger.warning(f"[Worker {self.worker_id}] Error: {error_message}")
         else:
             # Schedule retry with exponential backoff
             job.state = JobState.FAILED
             backoff_seconds = self.config.backoff_base ** job.attempts
-            next_retry = datetime.utcnow() + timedelta(seconds=backoff_seconds)
-            job.next_retry_at = next_retry.isoformat() + "Z"
+            job.next_retry_at = _utcnow_iso(backoff_seconds)
             
-            print(f"[Worker {self.worker_id}] Job {job.id} failed "
-                  f"(attempt {job.attempts}/{job.max_retries}), "
-                  f"retrying in {backoff_seconds}s")
-            print(f"[Worker {self.worker_id}] Error: {error_message}")
+            logger.warning(f"[Worker {self.worker_id}] Job {job.id} failed "
+                           f"(attempt {job.attempts}/{job.max_retries}), "
+                           f"retrying in {backoff_seconds}s")
+            logger.warning(f"[Worker {self.worker_id}] Error: {error_message}")
+
+
+def _run_command(command: str, timeout: Optional[float], output) -> int:
+    """
+    Run a shell command with stdout and stderr both sent to output.
+    
+    output is an empty binary file that is left holding the job's output;
+    nothing is read back here. Returns the exit code.
+    
+    close_fds=False lets CPython start the child with posix_spawn (vfork
+    semantics) instead of fork+exec, so launching a job does not copy the
+    worker's page tables. Descriptors opened by Python and SQLite are
+    close-on-exec already, so nothing extra leaks into the job.
+    """
+    process = subprocess.Popen(
+        command,
+        shell=True,
+        stdout=output,
+        stderr=subprocess.STDOUT,
+        close_fds=False
+    )
+    try:
+        _wait_with_alarm(process, timeout)
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    return process.returncode
+
+
+def _wait_with_alarm(process: subprocess.Popen, timeout: Optional[float]):
+    """
+    Wait for process, raising subprocess.TimeoutExpired after timeout seconds.
+    
+    Popen.wait(timeout) polls waitpid with growing sleeps. Instead block in
+    waitpid and let an ITIMER_REAL SIGALRM kill the child at the deadline,
+    which ends the wait. The handler doesn't raise, so an alarm landing
+    after the child exited on its own can't escape the cleanup below or
+    turn a finished job into a timeout.
+    Signal handlers can only be set from the main thread, so other threads
+    fall back to Popen.wait.
+    """
+    if not timeout or threading.current_thread() is not threading.main_thread():
+        process.wait(timeout=timeout)
+        return
+    
+    timed_out = False
+    
+    def on_alarm(signum, frame):
+        nonlocal timed_out
+        if process.returncode is None:
+            timed_out = True
+            process.kill()
+    
+    previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+        process.wait()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+    
+    if timed_out:
+        raise subprocess.TimeoutExpired(process.args, timeout)
+
+
+def _read_tail(output, limit: int) -> str:
+    """Decode at most the last limit bytes written to output."""
+    size = output.seek(0, os.SEEK_END)
+    output.seek(max(0, size - limit))
+    return output.read().decode("utf-8", errors="replace")
+
+
+def worker_log_path(db_path: str, worker_id: str) -> str:
+    """Log file of a worker running against the given database."""
+    log_dir = os.path.join(os.path.dirname(os.path.abspath(db_path)), LOG_DIR_NAME)
+    return os.path.join(log_dir, f"{worker_id}.log")
 
 
-def run_worker(worker_id: str, db_path: str = "queuectl.db"):
-    """Entry point for worker process."""
-    worker = Worker(worker_id, db_path)
-    worker.start()
+def _start_log_listener(log_path: str, log_to_stdout: bool):
+    """
+    Route worker log records through a queue to log_path (and stdout).
+    
+    The worker loop only enqueues records; a background thread does the
+    formatting and the write(2). SimpleQueue is used because its put() is
+    safe to call from the shutdown signal handler.
+    The handler sits on the package logger so records from other queuectl
+    modules (e.g. storage errors) reach the worker log too.
+    Returns (listener, queue_handler) for _stop_log_listener.
+    """
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_path, maxBytes=LOG_MAX_BYTES, backupCount=1)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    handlers = [file_handler]
+    if log_to_stdout:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(logging.Formatter("%(message)s"))
+        handlers.append(stream_handler)
+    
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    
+    package_logger.addHandler(queue_handler)
+    package_logger.setLevel(logging.INFO)
+    package_logger.propagate = False
+    listener.start()
+    return listener, queue_handler
+
+
+def _stop_log_listener(listener, queue_handler):
+    """Drain queued records and close the handlers."""
+    package_logger.removeHandler(queue_handler)
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def run_worker(worker_id: str, db_path: str = "queuectl.db", log_to_stdout: bool = True):
+    """
+    Entry point for worker process.
+    
+    Logs always go to worker_log_path(db_path, worker_id); log_to_stdout
+    also echoes them for foreground runs.
+    """
+    listener, queue_handler = _start_log_listener(
+        worker_log_path(db_path, worker_id), log_to_stdout)
+    try:
+        worker = Worker(worker_id, db_path)
+        worker.start()
+    finally:
+        # Drains whatever is still queued before the process exits
+        _stop_log_listener(listener, queue_handler)
@@ -2,141 +2,243 @@
 Worker manager for controlling worker processes.
 """
 
+import fcntl
 import os
 import signal
-import subprocess
+import struct
+import sys
 import time
 import psutil
+from contextlib import contextmanager
 from pathlib import Path
 from typing import List, Dict
 
+from .worker_logic import run_worker
+
+
+# PID file record: one little-endian 32-bit int per worker
+PID_RECORD_FORMAT = "<{}i"
+PID_RECORD_SIZE = struct.calcsize("<i")
+
 
 class WorkerManager:
     """Manages worker processes."""
     
+    # psutil handles for running workers, kept so cpu_percent can measure
+    # since the previous status call instead of sleeping for a fresh sample
+    _processes: Dict[int, psutil.Process] = {}
+    
     def __init__(self, db_path: str = "queuectl.db"):
         """Initialize worker manager."""
         self.db_path = db_path
         self.pid_file = Path(".queuectl_workers.pid")
+        # (file identity, pids) from the last read or write of the PID file
+        self._pids_cache = None
+        # Separate from the PID file, which gets replaced and removed
+        self.lock_file = Path(".queuectl_workers.lock")
+        self._lock_fd = None
+    
+    @contextmanager
+    def _pid_file_lock(self, exclusive: bool):
+        """
+        Hold an flock shared by every queuectl process in this directory.
+        
+        start/stop take it exclusively so concurrent calls can't both spawn
+        workers or lose each other's PIDs; status reads take it shared.
+        """
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
     
     def start_workers(self, count: int = 1) -> List[int]:
         """Start worker processes."""
-        pids = []
-        
-        # Check if workers are already running
-        existing_pids = self._get_running_workers()
-        if existing_pids:
-            print(f"Workers already running with PIDs: {existing_pids}")
-            print("Stop existing workers before starting new ones.")
-            return []
-        
-        for i in range(count):
-            worker_id = f"worker-{i+1}"
-            pid = self._start_worker(worker_id)
-            if pid:
-                pids.append(pid)
-                print(f"Started {worker_id} with PID {pid}")
-        
-        # Save PIDs to file
-        if pids:
-            self._save_pids(pids)
-            print(f"\nStarted {len(pids)} worker(s)")
-        
-        return pids
+        with self._pid_file_lock(exclusive=True):
+            pids = []
+            
+            # Check if workers are already running
+            existing_pids = [pid for pid in self._get_running_workers()
+                             if not self._is_zombie(pid)]
+            if existing_pids:
+                print(f"Workers already running with PIDs: {existing_pids}")
+                print("Stop existing workers before starting new ones.")
+                return []
+            
+            # Fork every worker first, then give them all one shared moment to start
+            spawned = []
+            for i in range(count):
+                worker_id = f"worker-{i+1}"
+                pid = self._start_worker(worker_id)
+                if pid:
+                    spawned.append((worker_id, pid))
+            
+            if spawned:
+                time.sleep(0.5)
+            
+            for worker_id, pid in spawned:
+                # Check if process is still running (reaps it if it already exited)
+                exited_pid, _ = os.waitpid(pid, os.WNOHANG)
+                if exited_pid == 0:
+                    pids.append(pid)
+                    print(f"Started {worker_id} with PID {pid}")
+                else:
+                    print(f"Failed to start {worker_id}")
+            
+            # Save PIDs to file
+            if pids:
+                self._save_pids(pids)
+                print(f"\nStarted {len(pids)} worker(s)")
+            
+            return pids
     
     def _start_worker(self, worker_id: str) -> int:
         """Start a single worker process."""
         try:
-            # Start worker as subprocess
-            process = subprocess.Popen(
-                [
-                    "python3", "-c",
-                    f"from queuectl.worker_logic import run_worker; "
-                    f"run_worker('{worker_id}', '{self.db_path}')"
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                start_new_session=True  # Detach from parent
-            )
-            
-            # Give it a moment to start
-            time.sleep(0.5)
-            
-            # Check if process is still running
-            if process.poll() is None:
-                return process.pid
-            else:
-                print(f"Failed to start {worker_id}")
-                return None
+            # Fork so the worker reuses this interpreter and its imported
+            # modules; don't let the child inherit unflushed output
+            sys.stdout.flush()
+            sys.stderr.flush()
+            pid = os.fork()
+            if pid == 0:
+                self._run_forked_worker(worker_id)
+            return pid
                 
         except Exception as e:
             print(f"Error starting worker {worker_id}: {e}")
             return None
     
+    def _run_forked_worker(self, worker_id: str):
+        """Body of a forked worker process. Never returns."""
+        exit_code = 1
+        try:
+            # The lock lives on the open file, so an inherited copy would keep
+            # it held for as long as this worker runs
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+            
+            # Detach from the parent's session and terminal
+            os.setsid()
+            devnull = os.open(os.devnull, os.O_RDWR)
+            for fd in (0, 1, 2):
+                os.dup2(devnull, fd)
+            os.close(devnull)
+            
+            # stdout is /dev/null here; the worker logs to its file only
+            run_worker(worker_id, self.db_path, log_to_stdout=False)
+            exit_code = 0
+        finally:
+            # Skip the parent's atexit handlers and buffered-output flushes
+            os._exit(exit_code)
+    
     def stop_workers(self, graceful: bool = True) -> int:
         """Stop all worker processes."""
-        pids = self._get_running_workers()
-        
-        if not pids:
-            print("No workers running")
-            return 0
-        
-        stopped_count = 0
-        
-        for pid in pids:
-            try:
-                if self._is_process_running(pid):
-                    if graceful:
-                        # Send SIGTERM for graceful shutdown
-                        os.kill(pid, signal.SIGTERM)
-                        print(f"Sent shutdown signal to worker with PID {pid}")
-                        
-                        # Wait up to 10 seconds for graceful shutdown
-                        for _ in range(10):
-                            if not self._is_process_running(pid):
-                                break
-                            time.sleep(1)
-                        
-                        # Force kill if still running
-                        if self._is_process_running(pid):
+        with self._pid_file_lock(exclusive=True):
+            pids = self._get_running_workers()
+            
+            if not pids:
+                print("No workers running")
+                return 0
+            
+            signalled = []
+            
+            # Signal every worker up front so they all shut down in parallel
+            for pid in pids:
+                try:
+                    if self._is_process_running(pid):
+                        if graceful:
+                            # Send SIGTERM for graceful shutdown
+                            os.kill(pid, signal.SIGTERM)
+                            print(f"Sent shutdown signal to worker with PID {pid}")
+                        else:
+                            # Immediate kill
                             os.kill(pid, signal.SIGKILL)
-                            print(f"Force killed worker with PID {pid}")
-                    else:
-                        # Immediate kill
+                            print(f"Killed worker with PID {pid}")
+                        
+                        signalled.append(pid)
+                except ProcessLookupError:
+                    # Process already dead
+                    pass
+                except Exception as e:
+                    print(f"Error stopping worker {pid}: {e}")
+            
+            stopped_count = len(signalled)
+            
+            if graceful:
+                # Wait up to 10 seconds in total for graceful shutdown. The workers
+                # aren't our children, so poll for them rather than waitpid()
+                remaining = signalled
+                deadline = time.monotonic() + 10
+                polls = 0
+                while remaining and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    polls += 1
+                    remaining = [pid for pid in remaining if self._is_process_running(pid)]
+                    # kill(0) can't tell an exited-but-unreaped worker from a
+                    # live one, so look for zombies only every 0.5s
+                    if polls % 10 == 0:
+                        remaining = [pid for pid in remaining if not self._is_zombie(pid)]
+                
+                remaining = [pid for pid in remaining if not self._is_zombie(pid)]
+                
+                # Force kill whatever is still running
+                for pid in remaining:
+                    try:
                         os.kill(pid, signal.SIGKILL)
-                        print(f"Killed worker with PID {pid}")
-                    
-                    stopped_count += 1
-            except ProcessLookupError:
-                # Process already dead
-                pass
-            except Exception as e:
-                print(f"Error stopping worker {pid}: {e}")
-        
-        # Clear PID file
-        if self.pid_file.exists():
-            self.pid_file.unlink()
-        
-        print(f"\nStopped {stopped_count} worker(s)")
-        return stopped_count
+                        print(f"Force killed worker with PID {pid}")
+                    except ProcessLookupError:
+                        pass
+                    except Exception as e:
+                        print(f"Error stopping worker {pid}: {e}")
+            
+            # Clear PID file
+            if self.pid_file.exists():
+                self.pid_file.unlink()
+            self._pids_cache = None
+            
+            print(f"\nStopped {stopped_count} worker(s)")
+            return stopped_count
     
     def get_worker_status(self) -> List[Dict]:
         """Get status of running workers."""
-        pids = self._get_running_workers()
+        # Shared lock: concurrent readers mustn't rewrite the PID file
+        with self._pid_file_lock(exclusive=False):
+            pids = self._get_running_workers(prune=False)
         workers = []
+        processes = []
+        needs_sample = False
         
+        # First pass: reuse known handles, prime cpu_percent on new ones
         for pid in pids:
+            process = self._processes.get(pid)
             try:
-                if self._is_process_running(pid):
+                if process is None or not process.is_running():
                     process = psutil.Process(pid)
-                    workers.append({
-                        'pid': pid,
-                        'status': process.status(),
-                        'cpu_percent': process.cpu_percent(interval=0.1),
-                        'memory_mb': process.memory_info().rss / 1024 / 1024,
-                        'created': time.strftime('%Y-%m-%d %H:%M:%S', 
-                                                time.localtime(process.create_time()))
-                    })
+                    process.cpu_percent(interval=None)
+                    needs_sample = True
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            processes.append(process)
+        
+        WorkerManager._processes = {process.pid: process for process in processes}
+        
+        # One shared sampling window instead of 0.1s per worker
+        if needs_sample:
+            time.sleep(0.1)
+        
+        for process in processes:
+            try:
+                workers.append({
+                    'pid': process.pid,
+                    'status': process.status(),
+                    'cpu_percent': process.cpu_percent(interval=None),
+                    'memory_mb': process.memory_info().rss / 1024 / 1024,
+                    'created': time.strftime('%Y-%m-%d %H:%M:%S', 
+                                            time.localtime(process.create_time()))
+                })
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 pass
         
@@ -144,27 +246,65 @@ class WorkerManager:
     
     def _save_pids(self, pids: List[int]):
         """Save PIDs to file."""
-        with open(self.pid_file, 'w') as f:
-            f.write('\n'.join(map(str, pids)))
+        # Write a temp file and rename it over the old one so readers never
+        # see a partially written file
+        tmp_file = self.pid_file.with_name(self.pid_file.name + ".tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(struct.pack(PID_RECORD_FORMAT.format(len(pids)), *pids))
+        os.replace(tmp_file, self.pid_file)
+        self._pids_cache = (self._pid_file_identity(os.stat(self.pid_file)), list(pids))
+    
+    @staticmethod
+    def _pid_file_identity(st: os.stat_result) -> tuple:
+        """Changes whenever the PID file is rewritten."""
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
     
-    def _get_running_workers(self) -> List[int]:
-        """Get list of running worker PIDs."""
-        if not self.pid_file.exists():
+    def _read_pids(self) -> List[int]:
+        """Read PIDs from file, reparsing only if it changed since last time."""
+        try:
+            st = os.stat(self.pid_file)
+        except FileNotFoundError:
+            self._pids_cache = None
             return []
         
+        identity = self._pid_file_identity(st)
+        if self._pids_cache and self._pids_cache[0] == identity:
+            return list(self._pids_cache[1])
+        
+        data = self.pid_file.read_bytes()
+        if data and b"\0" not in data:
+            # Text file written by an older version; real PIDs are below
+            # 2**24, so every binary record contains a zero byte
+            pids = [int(line) for line in data.split() if line]
+        else:
+            count = len(data) // PID_RECORD_SIZE
+            pids = list(struct.unpack(PID_RECORD_FORMAT.format(count),
+                                      data[:count * PID_RECORD_SIZE]))
+        self._pids_cache = (identity, pids)
+        return list(pids)
+    
+    def _get_running_workers(self, prune: bool = True) -> List[int]:
+        """
+        Get list of running worker PIDs.
+        
+        With prune, dead PIDs are also removed from the PID file, which
+        requires holding the PID file lock exclusively.
+        """
         try:
-            with open(self.pid_file, 'r') as f:
-                pids = [int(line.strip()) for line in f if line.strip()]
+            pids = self._read_pids()
+            if not pids:
+                return []
             
             # Filter out dead processes
             running_pids = [pid for pid in pids if self._is_process_running(pid)]
             
             # Update PID file with only running processes
-            if len(running_pids) != len(pids):
+            if prune and len(running_pids) != len(pids):
                 if running_pids:
                     self._save_pids(running_pids)
                 else:
                     self.pid_file.unlink()
+                    self._pids_cache = None
             
             return running_pids
         except Exception as e:
@@ -173,8 +313,29 @@ class WorkerManager:
     
     def _is_process_running(self, pid: int) -> bool:
         """Check if a process is running."""
+        # Signal 0 only checks that the pid exists: one syscall, no /proc reads
+        try:
+            os.kill(pid, 0)
+            return True
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # Exists, but belongs to another user
+            return True
+    
+    def _is_zombie(self, pid: int) -> bool:
+        """
+        Check if a process has exited but not been reaped yet.
+        
+        Such workers (e.g. under a container PID 1 that doesn't reap) still
+        pass _is_process_running. Reads the state field of /proc/<pid>/stat;
+        returns False where that isn't available.
+        """
         try:
-            process = psutil.Process(pid)
-            return process.is_running() and process.status() != psutil.STATUS_ZOMBIE
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return False
\ No newline at end of file
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            return False
+        # The command name in parentheses may contain spaces
+        fields = stat[stat.rfind(b")") + 1:].split()
+        return bool(fields) and fields[0] == b"Z"
\ No newline at end of file
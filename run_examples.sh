@@ -11,7 +11,7 @@ echo ""
 # Cleanup from previous runs
 echo "Cleaning up from previous runs..."
 queuectl worker stop --force 2>/dev/null || true
-rm -f queuectl.db queuectl.db-journal .queuectl_workers.pid
+rm -f queuectl.db queuectl.db-journal queuectl.db-wal queuectl.db-shm .queuectl_workers.pid .queuectl_workers.lock
 sleep 1
 echo ""
 
@@ -44,7 +44,7 @@ echo "---------------------------------------------------------"
 
 # Cleanup first
 queuectl worker stop --force >/dev/null 2>&1 || true
-rm -f .queuectl_workers.pid
+rm -f .queuectl_workers.pid .queuectl_workers.lock
 
 # Enqueue a job that always fails (exit 1)
 queuectl enqueue '{"id":"fail-retry-demo","command":"exit 1","max_retries":3}'
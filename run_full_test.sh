@@ -34,7 +34,7 @@ cleanup() {
     echo "🧹 Cleaning up old data and workers..."
     queuectl worker stop --force >/dev/null 2>&1 || true
     # ✅ FIX: Added ./fix_me.txt to the cleanup
-    rm -f queuectl.db queuectl.db-journal .queuectl_workers.pid worker.log test_output.txt ./fix_me.txt
+    rm -f queuectl.db queuectl.db-journal queuectl.db-wal queuectl.db-shm .queuectl_workers.pid .queuectl_workers.lock worker.log test_output.txt ./fix_me.txt
     echo "Cleanup complete."
 }
 
@@ -35,6 +35,12 @@ setup(
         "psutil>=5.9.0",
         "Flask>=2.0.0",
     ],
+    extras_require={
+        # Faster JSON encoding for the dashboard API
+        "speedups": ["orjson>=3.0"],
+        # Job.to_msgpack / Job.from_msgpack
+        "msgpack": ["msgpack>=1.0"],
+    },
     entry_points={
         "console_scripts": [
             "queuectl=queuectl.cli:main",
@@ -14,7 +14,7 @@ echo "--- 2. Activating Environment & Installing Dependencies ---"
     
     # Reads your setup.py and installs your project + dependencies
     echo "Installing queuectl and all dependencies..."
-    pip install -e .
+    pip install -e ".[speedups]"
     
     # Install dashboard dependency
     echo "Installing Flask for the dashboard..."